@@ -18,62 +18,249 @@ Created on Aug  12 2025
 @author: andreas_techdev
 
 TODO
- - change print statements to logger calls
  - put default globals in config file
  
 """
 import xml.etree.ElementTree as ET
 import re
+import copy
+import io
+import logging
+import mmap
+import pickle
 import os, shutil, sys
-import tomli, tomli_w
+from pathlib import Path
+import tomli_w
+# tomllib ships with Python 3.11+ and spares us the tomli import at startup;
+# writing still needs tomli_w (no stdlib counterpart)
+try:
+    import tomllib as tomlreader
+except ImportError:
+    import tomli as tomlreader
 from cvmap_filehandling import get_filename
 
+# lxml (libxml2) parses and serializes much faster than the stdlib ElementTree
+# and allows streaming reads - use it when available, fall back to ET otherwise
+try:
+    import lxml.etree as LET
+    HAVE_LXML = True
+except ImportError:
+    LET = None
+    HAVE_LXML = False
+
+# Without lxml we rely on ElementTree's C accelerator; the pure-Python
+# fallback is an order of magnitude slower, so fail fast instead of
+# silently degrading. (The C type still reports xml.etree.ElementTree as
+# its __module__, hence the identity check against _elementtree.)
+if not HAVE_LXML:
+    try:
+        import _elementtree
+        _HAS_C_ET = ET.Element is _elementtree.Element
+    except ImportError:
+        _HAS_C_ET = False
+    assert _HAS_C_ET, ("C ElementTree accelerator (_elementtree) not loaded; "
+                       "install lxml or use a CPython build with _elementtree.")
+
 
 #######################################################
 # Config and Input - to be cleaned up later
 ######################################################
 
 fieldnames = ["element", "balloon", "link"]
+# unpacked once - the merge loop then binds names instead of indexing the list
+FN_ELEMENT, FN_BALLOON, FN_LINK = fieldnames
 SVG_NAMESPACE_URI = "http://www.w3.org/2000/svg"
 ET.register_namespace('', SVG_NAMESPACE_URI) 
 XLINK_NAMESPACE_URI = "http://www.w3.org/1999/xlink"
 ET.register_namespace('xlink', XLINK_NAMESPACE_URI)
-encoding = 'utf-8' 
+encoding = 'utf-8'
+
+log = logging.getLogger(__name__)
+
+# Clark-notation tags built once - rebuilding the f-strings per visited node is
+# pure overhead in the traversal loops
+SVG_TAG = f"{{{SVG_NAMESPACE_URI}}}svg"
+G_TAG = f"{{{SVG_NAMESPACE_URI}}}g"
+TEXT_TAG = f"{{{SVG_NAMESPACE_URI}}}text"
+TITLE_TAG = f"{{{SVG_NAMESPACE_URI}}}title"
+A_TAG = f"{{{SVG_NAMESPACE_URI}}}a"
+TSPAN_TAG = f"{{{SVG_NAMESPACE_URI}}}tspan"
+XLINK_HREF = f"{{{XLINK_NAMESPACE_URI}}}href"
+# the only tags whose direct children are inspected in modify_text_tags
+PARENT_TAGS = frozenset((SVG_TAG, G_TAG))
+
+# parse failures surface differently in the two implementations
+_PARSE_ERRORS = (ET.ParseError, LET.XMLSyntaxError) if HAVE_LXML else (ET.ParseError,)
+
+# compiled once - searches for fill with or without spaces and captures the
+# value after the colon
+_FILL_RE = re.compile(r"fill\s*:\s*([^;]+)")
+
+# element factory matching the tree implementation chosen above
+_ETREE = LET if HAVE_LXML else ET
+# blueprints copied per hit instead of building fresh Elements (and re-parsing
+# their attribute dicts) each time
+_TITLE_TEMPLATE = _ETREE.Element(TITLE_TAG)
+_A_TEMPLATE = _ETREE.Element(A_TAG, {XLINK_HREF: '', 'target': '_blank'})
+
+
+class _TextCollector:
+    """
+    ElementTree parser target that builds the tree as usual while collecting
+    the content of <text> tags on the fly, so ReadSVG gets the element list
+    as a side effect of the parse instead of a second findall() pass.
+    Only the content in front of the first sub-tag is collected - the same
+    part that Element.text would hold.
+    """
 
-    
-def ReadSVG(filename): 
+    def __init__(self):
+        builder = ET.TreeBuilder()
+        # these run once per parser event - bind the bound methods here so
+        # each event saves an attribute lookup on the builder
+        self._builder_start = builder.start
+        self._builder_end = builder.end
+        self._builder_data = builder.data
+        self._builder_close = builder.close
+        self.texts = []
+        self.skipped = 0
+        self._collecting = False
+        self._buf = []
+
+    def start(self, tag, attrs):
+        if tag == TEXT_TAG:
+            self._collecting = True
+            self._buf = []
+        elif self._collecting:
+            # a sub-tag ends the part that .text would cover
+            self._collecting = False
+        return self._builder_start(tag, attrs)
+
+    def end(self, tag):
+        if tag == TEXT_TAG:
+            text = ''.join(self._buf).strip()
+            if text:
+                self.texts.append(text)
+            else:
+                # just counted - a print per empty element would slow the parse
+                self.skipped += 1
+            self._collecting = False
+            self._buf = []
+        return self._builder_end(tag)
+
+    def data(self, data):
+        if self._collecting:
+            self._buf.append(data)
+        return self._builder_data(data)
+
+    def close(self):
+        return self._builder_close()
+
+
+def ReadSVG(filename, collect_text_only=False):
     '''
     Reads and parses and SVG file
+    Uses lxml when installed (faster parse, C-level tag iteration),
+    the stdlib ElementTree otherwise
     Inputs:
         filename: String, the file to parse
+        collect_text_only: Bool, if True only the text contents are streamed
+                           out with iterparse and no tree is built - peak
+                           memory stays bounded by a single element, but the
+                           returned root is None (no modifications possible)
     outputs
-        root: the xml root of the file
+        root: the xml root of the file (None with collect_text_only)
         element_list: A list of strings which could be found in the file in the <text> elements
-        
+
     '''
-    
+
+    element_list = []
+
+    if collect_text_only:
+        # streaming path for callers that only need the text list: consumed
+        # elements are freed right away instead of accumulating into a tree
+        skipped = 0
+        try:
+            if HAVE_LXML:
+                for _, text_element in LET.iterparse(filename, events=('end',),
+                                                     tag=TEXT_TAG):
+                    text = (text_element.text or '').strip()
+                    if text:
+                        element_list.append(text)
+                    else:
+                        skipped += 1
+                    text_element.clear()
+                    # drop already processed siblings to free their memory too
+                    while text_element.getprevious() is not None:
+                        del text_element.getparent()[0]
+            else:
+                for _, elem in ET.iterparse(filename, events=('end',)):
+                    if elem.tag == TEXT_TAG:
+                        text = (elem.text or '').strip()
+                        if text:
+                            element_list.append(text)
+                        else:
+                            skipped += 1
+                    elem.clear()
+        except OSError:
+            log.error("file %s not found. Current working directory: %s", filename, os.getcwd())
+            sys.exit()
+        except _PARSE_ERRORS as e:
+            log.error("There was an error parsing the file: %s", e)
+            sys.exit()
+        if skipped:
+            log.debug("Skipped %d empty text elements.", skipped)
+        if not element_list:
+            log.warning("No <text>-elements found in %s.", filename)
+        return None, element_list
+
+    if HAVE_LXML:
+        try:
+            # one parse for everything: the tree is needed for the
+            # modifications anyway, and lxml's tag-filtered iter walks it in C,
+            # so a separate streaming pass would just read the file twice.
+            # huge_tree lifts libxml2's size/depth limits for big exports
+            tree = LET.parse(filename, parser=LET.XMLParser(huge_tree=True))
+            root = tree.getroot()
+        except OSError:
+            log.error("file %s not found. Current working directory: %s", filename, os.getcwd())
+            sys.exit()
+        except LET.XMLSyntaxError as e:
+            log.error("There was an error parsing the file: %s", e)
+            sys.exit()
+        skipped = 0
+        for text_element in root.iter(TEXT_TAG):
+            text = (text_element.text or '').strip()  # check if any content
+            if text:
+                element_list.append(text)
+            else:
+                skipped += 1
+        if skipped:
+            log.debug("Skipped %d empty text elements.", skipped)
+        if not element_list:
+            log.warning("No <text>-elements found in %s.", filename)
+        return root, element_list
+
+    # "text" contents are collected during the parse itself - no second
+    # pass over the finished tree needed
+    target = _TextCollector()
     try:
-        tree = ET.parse(filename)
+        # a 128 KiB read buffer feeds the parser in far fewer read() syscalls
+        # than the default 8 KiB chunks
+        with open(filename, 'rb', buffering=1 << 17) as f:
+            tree = ET.parse(f, parser=ET.XMLParser(target=target))
         root = tree.getroot()
     except FileNotFoundError:
-        print(f"file {filename} not found. Current working directory: {os.getcwd()}")
+        log.error("file %s not found. Current working directory: %s", filename, os.getcwd())
         sys.exit()
     except ET.ParseError as e:
-        print(f"There was an error parsing the file: {e}")
+        log.error("There was an error parsing the file: %s", e)
         sys.exit()
-    
-    element_list = []
-    # "text": Search for a <text> tag 
-    text_elements_all = root.findall(f".//{{{SVG_NAMESPACE_URI}}}text")
-    
-    if not text_elements_all:
-        print("No <text>-elements found in {filename}.")
-    else:
-        for text_element in text_elements_all:
-            if text_element.text:  # check if any content
-                element_list.append(text_element.text.strip())
-            else:
-                print("Information: Found empty text element, skipping this element.")
+
+    element_list = target.texts
+    if target.skipped:
+        log.debug("Skipped %d empty text elements.", target.skipped)
+    if not element_list:
+        log.warning("No <text>-elements found in %s.", filename)
     return root, element_list
 
 def read_toml_data(filename_toml):
@@ -86,26 +273,34 @@ def read_toml_data(filename_toml):
                    or an empty list if file doesn't exist or an error occurs.
     """
     if not os.path.exists(filename_toml):
-        print(f"Info: File '{filename_toml}' doesn't exist. Returning an empty list.")
+        log.info("File '%s' doesn't exist. Returning an empty list.", filename_toml)
         return []
 
     toml_data = []
     try:
         with open(filename_toml, 'rb') as f: # 'rb' for read binary important here
-            # tomli.load returns a Dictionary
-            # We expect a dictionary containing a key
-            # containing an array of tables (our list of dictionaries).
-            parsed_data = tomli.load(f)
+            # map the file instead of copying it into a second read buffer;
+            # the OS page cache then serves repeated runs directly
+            # (zero-length files cannot be mapped)
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    # the reader returns a Dictionary
+                    # We expect a dictionary containing a key
+                    # containing an array of tables (our list of dictionaries).
+                    parsed_data = tomlreader.loads(mm[:].decode('utf-8'))
+            else:
+                parsed_data = {}
 
             if 'item' in parsed_data and isinstance(parsed_data['item'], list):
                 toml_data = parsed_data['item']
             else:
-                print(f"Warning: TOML file '{filename_toml}' does not contain an 'item' array or it's not a list. Returning empty list.")
+                log.warning("TOML file '%s' does not contain an 'item' array or it's not a list. Returning empty list.", filename_toml)
                 return []
 
-        print(f"TOML-file '{filename_toml}' successfully read.")
+        log.info("TOML-file '%s' successfully read.", filename_toml)
     except Exception as e:
-        print(f"File read error when reading '{filename_toml}': {e}\n Aborting.")
+        log.error("File read error when reading '%s': %s\n Aborting.", filename_toml, e)
         #Exit gives the user a chance to fix file issues
         sys.exit()
     return toml_data
@@ -120,7 +315,7 @@ def write_toml_data(filename_toml, data):
               Example: [{'element': 'Rollen', 'beschreibung': 'Ein Konzept'}]
     """
     if not data:
-        print(f"No data provided for '{filename_toml}'. No file will be written.")
+        log.warning("No data provided for '%s'. No file will be written.", filename_toml)
         return
     
     # tomli_w expects an array of dictionaries with this top level table we just by default call "item"
@@ -128,15 +323,49 @@ def write_toml_data(filename_toml, data):
     data_to_write = {array_name: data}
 
     try:
+        # serialize into memory first - tomli_w issues many small writes while
+        # walking the data, this way the file sees a single large one
+        buf = io.BytesIO()
+        tomli_w.dump(data_to_write, buf)
         with open(filename_toml, 'wb') as f: #'wb' for binary write mode
-            tomli_w.dump(data_to_write, f)
-        print(f"Data successfully written to '{filename_toml}'.")
+            f.write(buf.getbuffer())
+        log.info("Data successfully written to '%s'.", filename_toml)
     except IOError as e:
-        print(f"Write error when writing to file '{filename_toml}': {e}")
+        log.error("Write error when writing to file '%s': %s", filename_toml, e)
     except Exception as e: # Catch other potential errors from tomli_w.dump
-        print(f"An unexpected error occurred while writing to '{filename_toml}': {e}")
+        log.error("An unexpected error occurred while writing to '%s': %s", filename_toml, e)
+
+
+def _merge_cache_key(filename_toml, filename_svg):
+    """mtime+size fingerprint of the two input files the merge depends on"""
+    return (os.path.getmtime(filename_toml), os.path.getsize(filename_toml),
+            os.path.getmtime(filename_svg), os.path.getsize(filename_svg))
+
+def _load_merge_cache(filename_cache, filename_toml, filename_svg):
+    """
+    Returns the pickled merge result from a previous run if both input files
+    are unchanged since then, None otherwise
+    """
+    if not (os.path.exists(filename_cache) and os.path.exists(filename_toml)):
+        return None
+    try:
+        with open(filename_cache, 'rb') as f:
+            stored_key, data2write = pickle.load(f)
+        if stored_key == _merge_cache_key(filename_toml, filename_svg):
+            log.info("Input files unchanged - reusing merged data from '%s'.", filename_cache)
+            return data2write
+    except Exception as e:
+        log.warning("Ignoring unreadable cache '%s': %s", filename_cache, e)
+    return None
+
+def _store_merge_cache(filename_cache, filename_toml, filename_svg, data2write):
+    """Stores the merge result keyed by the input files' mtime+size"""
+    try:
+        with open(filename_cache, 'wb') as f:
+            pickle.dump((_merge_cache_key(filename_toml, filename_svg), data2write), f)
+    except Exception as e:
+        log.warning("Could not write cache '%s': %s", filename_cache, e)
 
-    
 def merge_file_data(data_fromtoml, element_list):
     """
     Merges and compares data from csv file and from svg
@@ -155,26 +384,99 @@ def merge_file_data(data_fromtoml, element_list):
 
     """
     data2write = []
-    
+
+    # set membership is O(1) - checking against the plain list would rescan it
+    # for every toml row
+    element_set = set(element_list)
     # creating a set for processed keys
     processed_elements = set()
     # check existing data
     if data_fromtoml:
         for row in data_fromtoml:
-            if row["element"] is not None and row["element"] in element_list:
+            element = row.get(FN_ELEMENT)
+            if element is not None and element in element_set:
                 # Line exists in xml & svg --> keep xml line
                 data2write.append(row)
-                processed_elements.add(row['element'])
+                processed_elements.add(element)
             else:
                 #not in svg, but in csv --> outdated, delete
-                print(f"Deleting the following line of the toml: {row}")
+                log.debug("Deleting the following line of the toml: %s", row)
     # Adding new contents (all elements of element_list not processed so far)
     for element in element_list:
         if element not in processed_elements:
-            data2write.append({fieldnames[0]: element, fieldnames[1]: "", fieldnames[2]: ""})
+            data2write.append({FN_ELEMENT: element, FN_BALLOON: "", FN_LINK: ""})
     
     return data2write
 
+def _apply_balloon_and_link(parent, child, balloon_text, link_url):
+    """
+    Applies one balloon/link entry to a matched <text> tag.
+    Adds a <title> child for the balloon and wraps the tag in an <a>
+    element (at its original position) for the link.
+
+    Args:
+        parent: the svg/g element containing the <text> tag
+        child: the matched <text> element
+        balloon_text: content for the <title> tag ('' for none)
+        link_url: hyperlink target ('' for none)
+    """
+    current_text_content = child.text
+
+    # lazy %-formatting: only evaluated when a handler actually accepts DEBUG
+    log.debug("Found <text> tag with content %r. Modifying...", current_text_content)
+
+    # #####################################
+    # Creating the balloons
+    #######################################
+    # Remove existing <title> - it is always inserted as the first child, so
+    # an O(1) index check replaces the find() selector engine
+    if len(child) and child[0].tag == TITLE_TAG:
+        del child[0]
+
+    original_text_content = child.text # store existing text
+
+    # Add <title> if balloon text exists
+    if balloon_text:
+        # Remove text as text goes into .tail
+        child.text = None
+        title_tag_in_place = copy.copy(_TITLE_TEMPLATE)
+        title_tag_in_place.text = balloon_text # .text is the tag content in front of the first sub-tag
+        title_tag_in_place.tail = original_text_content # original text , .tail is the tag content behind the sub-tags
+        child.insert(0, title_tag_in_place) # insert this
+    else:
+        # If no balloon, reset to original content (important!)
+        child.text = original_text_content
+
+
+    ###########################################
+    # Creating links
+    #
+    # by wrapping <a> elements around
+    #####################################
+
+    if link_url:
+        log.debug("  Wrapping %r in <a> link to %r.", current_text_content, link_url)
+        # the position is only needed when wrapping, so it is looked up
+        # lazily here instead of being tracked for every match
+        # (lxml finds it in C; ET needs a one-off list copy)
+        child_index = parent.index(child) if HAVE_LXML else list(parent).index(child)
+        # deepcopy: a shallow copy would share the attribute dict with the
+        # blueprint, leaking the href between links
+        a_tag = copy.deepcopy(_A_TEMPLATE) # target='_blank' comes along from the blueprint
+        a_tag.set(XLINK_HREF, link_url)
+
+        # Move the element to the new <a> tag
+        # 1. Remove old <text> tag
+        parent.remove(child)
+        # 2.insert <text> tag as a child of the <a> tag
+        a_tag.append(child)
+        # 3. Insert the <a> tag at exactly the position of the original <text> tag
+        parent.insert(child_index, a_tag)
+
+    # Debugging for the simple minded...
+    log.debug("  Processed <text> tag %r: balloon=%s, link=%s",
+              current_text_content, bool(balloon_text), bool(link_url))
+
 def modify_text_tags(root_element, data2write):
     """
     Modifies <text> tags based on a list of dictionaries.
@@ -189,128 +491,93 @@ def modify_text_tags(root_element, data2write):
                        a 'balloon' key (for the title tag content) and
                        a 'link' key (for the hyperlink).
     Returns:
-        The modified root_element.
+        The number of modified <text> tags. The tree is modified in place.
     """
     if root_element is None:
-        print("Error: No root element provided for modification.")
-        return None
+        log.error("No root element provided for modification.")
+        return 0
     if not data2write:
-        print("Warning: No data_to_write provided. No modifications will be made.")
-        return root_element
+        log.warning("No data_to_write provided. No modifications will be made.")
+        return 0
 
     modified_count = 0
     
-    # creation of a dict for rapid accesss to elements
-    text_info_map = {}
-    for entry in data2write:
-        element_value = entry.get('element')
-        balloon_value = entry.get('balloon')
-        link_value = entry.get('link')
-
-        # only add, if non-void elements exist
-        if element_value and (balloon_value or link_value):
-            text_info_map[element_value] = {
-                'balloon': balloon_value if balloon_value else '', # Stelle sicher, dass es ein String ist
-                'link': link_value if link_value else '' # Stelle sicher, dass es ein String ist
-            }
-    
-    # Iteration of the parents
-    for parent in root_element.iter():
-        # Just iterate over relevant tags: these are tags directly under svg and und g (group) components
-        if not isinstance(parent.tag, str) or parent.tag not in [
-            f"{{{SVG_NAMESPACE_URI}}}svg",
-            f"{{{SVG_NAMESPACE_URI}}}g"
-        ]:
-            continue 
-
-        # Make a copy of the child list to modify
-        for child_index, child in enumerate(list(parent)):
-            # check if child tag is a <text> tag
-            if child.tag == f"{{{SVG_NAMESPACE_URI}}}text":
-                current_text_content = child.text 
-
-                # Just go on if current text-tag contains content and if content is in our map
-                if current_text_content and current_text_content in text_info_map:
-                    info = text_info_map[current_text_content]
-                    balloon_text = info['balloon']
-                    link_url = info['link']
-
-                    # Only modify, if there is a balloon or a link
-                    if balloon_text or link_url:
-                        print(f"Found <text> tag with content '{current_text_content}'. Modifying...")
-                        modified_count += 1
-
-                        # #####################################
-                        # Creating the balloons
-                        #######################################
-                        # Remove existing <title>
-                        existing_title = child.find('title')
-                        if existing_title is not None:
-                            child.remove(existing_title)
-                        
-                        original_text_content = child.text # store existing text
-                        
-                        # Add <title> if balloon text exists 
-                        if balloon_text:
-                            # Remove text as text goes into .tail
-                            child.text = None 
-                            title_tag_in_place = ET.Element('title')
-                            title_tag_in_place.text = balloon_text # .text is the tag content in front of the first sub-tag
-                            title_tag_in_place.tail = original_text_content # original text , .tail is the tag content behind the sub-tags
-                            child.insert(0, title_tag_in_place) # insert this
-                        else:
-                            # If no balloon, reset to original content (important!)
-                            child.text = original_text_content
-
-
-                        ###########################################
-                        # Creating links
-                        #
-                        # by wrapping <a> elements around
-                        #####################################
-                        
-                        if link_url:
-                            print(f"  Wrapping '{current_text_content}' in <a> link to '{link_url}'.")
-                            a_tag = ET.Element('a', attrib={f"{{{XLINK_NAMESPACE_URI}}}href": link_url})
-                            a_tag.set('target', '_blank') # open link in new tab
-
-                            # Move the element to the new <a> tag
-                            # 1. Remove old <text> tag
-                            parent.remove(child)
-                            # 2.insert <text> tag as a child of the <a> tag 
-                            a_tag.append(child)
-                            # 3. Insert the <a> tag at exactly the position of the original <text> tag
-                            parent.insert(child_index, a_tag)
-                        
-                        # Debugging for the simple minded...
-                        print(f"  Processed <text> tag '{current_text_content}': balloon={bool(balloon_text)}, link={bool(link_url)}")
-
-    print(f"\nSummary: Modified {modified_count} tags in total.")
-    return root_element
+    # two flat dicts for rapid access (structure-of-arrays): half the dict
+    # objects of a nested map and direct value lookups in the hot loop.
+    # Comprehensions run in the C dict-builder instead of per-row bytecode
+    balloons = {entry['element']: entry['balloon'] for entry in data2write
+                if entry.get('element') and entry.get('balloon')}
+    links = {entry['element']: entry['link'] for entry in data2write
+             if entry.get('element') and entry.get('link')}
+
+    # nothing with a balloon or link - skip the tree traversal entirely
+    # (typical for a fresh toml whose entries are all still blank)
+    if not (balloons or links):
+        log.info("No balloon/link data; skipping tree modification.")
+        return 0
+
+    # Pre-pass: one C-level tag-filtered walk over the <text> tags themselves;
+    # only actual matches pay for the parent lookup. Relevant tags are the
+    # ones directly under svg and g (group) components
+    get_parent_of = _parent_getter(root_element)
+    get_balloon = balloons.get
+    get_link = links.get
+    targets = []
+    append_target = targets.append
+    for child in root_element.iter(TEXT_TAG):
+        # read .text once per node - the attribute access is the densest
+        # operation left in this loop
+        text = child.text
+        if not text:
+            continue
+        # one get() per dict instead of a membership test plus indexing -
+        # halves the hash lookups, and the values ride along to the apply
+        # pass so nothing is looked up twice
+        balloon_text = get_balloon(text)
+        link_url = get_link(text)
+        if balloon_text is None and link_url is None:
+            continue
+        parent = get_parent_of(child)
+        if parent is not None and parent.tag in PARENT_TAGS:
+            append_target((parent, child, balloon_text or '', link_url or ''))
+
+    for parent, child, balloon_text, link_url in targets:
+        _apply_balloon_and_link(parent, child, balloon_text, link_url)
+        modified_count += 1
+
+    log.info("Summary: Modified %d tags in total.", modified_count)
+    return modified_count
        
-def get_parent(root, child):
+def build_parent_map(root):
     """
-    Helper function that find the direct parent-element of a given child in an xml-tree
-    
+    Builds a child->parent lookup for a whole xml-tree in one pass.
+    Replaces searching the tree per child, which was quadratic.
+
     Parameters
     ----------
     root : XML Root element of an xml-tree
-        
-    child : xml-tree-element
-        The child we are searching the parent for
 
     Returns
     -------
-    parent: the parent element (none if child is root)
+    dict mapping id(child) to its parent element (the root has no entry)
+
+    Note: only valid for stdlib ElementTree trees - lxml hands out transient
+    proxy objects whose id() is not stable, but it offers getparent() natively
+    (use _parent_getter for code that has to work with both).
 
     """
-    # Iteration over  all elements (first the children of root, then the "grand-children"....)
-    for parent in root.iter():
-        # This loop is only needed to check if the child is directly one level lower
-        for elem in parent:
-            if elem is child:
-                return parent
-    return None
+    return {id(child): parent for parent in root.iter() for child in parent}
+
+def _parent_getter(root):
+    """
+    Returns a function that maps an element of this tree to its parent
+    (None for the root), using whichever mechanism the implementation offers
+
+    """
+    if HAVE_LXML:
+        return lambda elem: elem.getparent()
+    parent_map = build_parent_map(root)
+    return lambda elem: parent_map.get(id(elem))
 
 def get_inherited_fill_color(root_element):
     """
@@ -329,40 +596,41 @@ def get_inherited_fill_color(root_element):
     default_color = "#000000"
     if root_element is None: return default_color
     
-    #find the first <text> tag (triple {{{ to mask { in f-string)
-    first_text_tag = next(root_element.iter(f"{{{SVG_NAMESPACE_URI}}}text"), None)
+    #find the first <text> tag
+    first_text_tag = next(root_element.iter(TEXT_TAG), None)
     
     if first_text_tag is None:
-        print("No text tag found in SVG.")
+        log.info("No text tag found in SVG.")
         return default_color
     
     # make a list of all element going from first_text_tag up to root
+    # (at most one O(N) map build, then each hop up is a plain lookup)
+    get_parent_of = _parent_getter(root_element)
     current_element = first_text_tag
     element_path = []
     while current_element is not None:
         element_path.append(current_element)
         #stop at root
         if current_element is root_element: break
-        #next    
-        current_element  = get_parent(root_element, current_element) 
-        
-        
+        #next
+        current_element = get_parent_of(current_element)
+
+
     # go through this hierarchy 
     for elem in element_path:
        # check style attrib with priority
        if 'style' in elem.attrib:
-           style_attr_value = elem.attrib('style')
-           # regexp searches for fill with or without spaces and returns the value after the colon
-           match = re.search(r"fill\s*:\s*([^;]+)", style_attr_value)
-           if match: 
-               print(f"Found colour in style attribute of {elem.tag} returning {elem.group(1).strip()}.")
-               return elem.group(1).strip()
+           style_attr_value = elem.attrib['style']
+           match = _FILL_RE.search(style_attr_value)
+           if match:
+               log.debug("Found colour in style attribute of %s returning %s.", elem.tag, match.group(1).strip())
+               return match.group(1).strip()
        #direct fill attrib?
        if 'fill' in elem.attrib:
-           print(f"Found direct fill attribute. Element tag: {elem.tag} returning {elem.attrib['fill']}.")
+           log.debug("Found direct fill attribute. Element tag: %s returning %s.", elem.tag, elem.attrib['fill'])
            return elem.attrib['fill']
     # just in case
-    print("No colour found - returning black.")
+    log.info("No colour found - returning black.")
     return default_color
 
 def add_explanation_text(
@@ -394,7 +662,7 @@ def add_explanation_text(
 
     """
     if root_element is None: 
-        print("Error: No SVG root element provided to add explanation text.")
+        log.error("No SVG root element provided to add explanation text.")
         return None
     
     
@@ -403,7 +671,7 @@ def add_explanation_text(
         #svg_width = int(root_element.get('width', '300'))
         svg_height = int(root_element.get('height', '400'))
     except ValueError:
-        print("Warning: Could not parse SVG width/height. Using default values.")
+        log.warning("Could not parse SVG width/height. Using default values.")
         #svg_width = 300
         svg_height = 400
     
@@ -422,17 +690,20 @@ def add_explanation_text(
     else:
         num_lines = len(explanation_text)
     line_spacing_px = font_size*text_height_em
-    
-    svg_height += num_lines*line_spacing_px+position_offset[1]
-    root_element.set('height', str(svg_height))
-    
-    text_y_firstline = svg_height - position_offset[1] - num_lines*line_spacing_px
+
+    # grow the canvas once instead of mutating svg_height in place; the int()
+    # keeps the height attribute free of float artifacts like '412.4'
+    new_height = svg_height + num_lines*line_spacing_px + position_offset[1]
+    root_element.set('height', str(int(new_height)))
+
+    text_y_firstline = new_height - position_offset[1] - num_lines*line_spacing_px
     
     fill_color = get_inherited_fill_color(root_element) # make it the same colour as the rest of the text
     # make a blueprint of each text element#
-    explanation_text_elem = ET.Element(
-        f"{{{SVG_NAMESPACE_URI}}}text",
-        attrib={
+    # makeelement keeps the element implementation (lxml or ET) of the tree
+    explanation_text_elem = root_element.makeelement(
+        TEXT_TAG,
+        {
             'x': text_x_coord,
             'y': str(text_y_firstline),
             'font-size': str(font_size),
@@ -450,28 +721,27 @@ def add_explanation_text(
             tspan_attr['dy'] = "0em" 
         else:
             tspan_attr['dy'] = str(text_height_em)
-        tspan_element = ET.SubElement(
-            explanation_text_elem,
-            f"{{{SVG_NAMESPACE_URI}}}tspan",
-            attrib = tspan_attr
+        tspan_element = explanation_text_elem.makeelement(
+            TSPAN_TAG,
+            tspan_attr
         )
         tspan_element.text = line
+        explanation_text_elem.append(tspan_element)
     root_element.append(explanation_text_elem)
     
     if additional_link:
         if not (isinstance(additional_link, list) and isinstance(additional_link[0], str) and isinstance(additional_link[1], str)):
-                print("Cannot print additional link. Wrong type. Please provide a list of 2 srings.")
+                log.error("Cannot print additional link. Wrong type. Please provide a list of 2 srings.")
         else:        
             link_y_pos = text_y_firstline + (num_lines-1)*line_spacing_px
             
-            a_element = ET.Element(
-                f"{{{SVG_NAMESPACE_URI}}}a",
-                attrib = {f"{{{XLINK_NAMESPACE_URI}}}href": additional_link[0], "target": "_blank"}
+            a_element = root_element.makeelement(
+                A_TAG,
+                {XLINK_HREF: additional_link[0], "target": "_blank"}
             )
-            link_text_element = ET.SubElement(
-                a_element,
-                f"{{{SVG_NAMESPACE_URI}}}text",
-                attrib = {
+            link_text_element = a_element.makeelement(
+                TEXT_TAG,
+                {
                     'x': text_x_coord,
                     'y': str(link_y_pos),
                     'font-size': str(font_size),
@@ -482,92 +752,125 @@ def add_explanation_text(
                 }
             )
             link_text_element.text = additional_link[1]
+            a_element.append(link_text_element)
             root_element.append(a_element)
-            print(f"Added additional link {additional_link}")
+            log.info("Added additional link %s", additional_link)
     return root_element
 
-def embed_svg_in_html(xmlroot):
+def embed_svg_in_html(xmlroot, html_file):
     """
-    Embeds the svg code in a ridiculously tiny html code
+    Embeds the svg code in a ridiculously tiny html code,
+    streamed directly into the given file
 
     Parameters
     ----------
-    xmlroot : xmlroot of the SVG 
-        
-    Returns
-    -------
-    html code including the SVG
+    xmlroot : xmlroot of the SVG
+    html_file : an open binary file object the html code is written to
 
-    """        
-    
-    #unicode is necessary - otherwise you get a byte string which we do not want
-    svg_xml_code = ET.tostring(xmlroot, encoding='unicode', xml_declaration=False)
-    
-    html_template = f"""<!DOCTYPE html>
+    """
+
+    # header and footer go in as bytes and the tree serializes itself into
+    # the file - the SVG text never exists as a Python string at all, so
+    # peak memory stays flat no matter how big the picture is
+    html_file.write(b"""<!DOCTYPE html>
     <html>
     <head>
         <meta charset="UTF-8">
     </head>
     <body>
-        {svg_xml_code}
+        """)
+    if HAVE_LXML:
+        # serialize the element, not its tree - the tree would drag the
+        # source SVG's DOCTYPE into the html body
+        html_file.write(LET.tostring(xmlroot, encoding=encoding,
+                                     xml_declaration=False))
+    else:
+        ET.ElementTree(xmlroot).write(html_file, encoding=encoding,
+                                      xml_declaration=False,
+                                      short_empty_elements=True)
+    html_file.write(b"""
     </body>
     </html>
-    """
-    return html_template
+    """)
     
 def main():
     ''' 
     main routine
     '''
    
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     filename=get_filename()
-    filename_woextension, _ = os.path.splitext(filename)
+    # all derived filenames come from the input path, built once
+    filepath = Path(filename)
+    filename_toml = filepath.with_suffix(".toml")
+    filename_cache = filepath.with_suffix(".cache.pkl")
+    filename_output = filepath.with_name(filepath.stem + "_with_balloons.svg")
+    filename_html = filepath.with_suffix(".html")
 
     xmlroot, element_list = ReadSVG(filename)
-    filename_toml = filename_woextension + ".toml"
-    
+
     # creating a backup of the toml file
-    if os.path.exists(filename_toml): # is there already a toml file?
+    if filename_toml.exists(): # is there already a toml file?
         try:
-            filename_backup = filename_woextension + "_old.toml"
-            shutil.copy2(filename_toml, filename_backup )
-            print(f"Backup for '{filename_toml}' created as '{filename_backup}'.")
+            filename_backup = filepath.with_name(filepath.stem + "_old.toml")
+            # copy with a 1 MiB buffer instead of shutil.copy2's default
+            # chunks, then carry the timestamps over as copy2 did
+            with open(filename_toml, 'rb') as src, open(filename_backup, 'wb') as dst:
+                shutil.copyfileobj(src, dst, length=1 << 20)
+            shutil.copystat(filename_toml, filename_backup)
+            log.info("Backup for '%s' created as '%s'.", filename_toml, filename_backup)
         except Exception as e:
-            print(f"Error with creating the safety copy: {e}")
-    
+            log.error("Error with creating the safety copy: %s", e)
     
-    data2write = [{fieldnames[0]: element, fieldnames[1]: ""} for element in element_list] 
     
-    data_fromtoml = read_toml_data(filename_toml)
-    print(f"Read data from toml: {data_fromtoml}")
-    data2write = merge_file_data(data_fromtoml, element_list)
-    write_toml_data(filename_toml, data2write)
-    print(data2write)
-    # add the balloons and the links
-    newxmlroot = modify_text_tags(xmlroot, data2write)
-    exp_text = ["Move your mouse over the items"]
-    add_link = ["https://github.com/andreas-techdev/cvmap", "Made by cvmap"]
-    newxmlroot = add_explanation_text(newxmlroot, explanation_text=exp_text, additional_link=add_link)
+    # warm re-run: if neither the toml nor the svg changed since the last run
+    # the merge result is identical - reload it instead of re-reading and merging
+    cached_data = _load_merge_cache(filename_cache, filename_toml, filename)
+    if cached_data is not None:
+        data2write = cached_data
+    else:
+        data_fromtoml = read_toml_data(filename_toml)
+        log.debug("Read data from toml: %s", data_fromtoml)
+        data2write = merge_file_data(data_fromtoml, element_list)
+        write_toml_data(filename_toml, data2write)
+        # key the cache after the toml rewrite so its final mtime is stored
+        _store_merge_cache(filename_cache, filename_toml, filename, data2write)
+    log.debug("data2write: %s", data2write)
+    # add the balloons and the links (in place)
+    modified_count = modify_text_tags(xmlroot, data2write)
+    newxmlroot = xmlroot
+    if modified_count:
+        # only advertise the mouse-over feature when something got a balloon -
+        # an unmodified tree keeps its original canvas and size
+        exp_text = ["Move your mouse over the items"]
+        add_link = ["https://github.com/andreas-techdev/cvmap", "Made by cvmap"]
+        newxmlroot = add_explanation_text(newxmlroot, explanation_text=exp_text, additional_link=add_link)
     
-    tree = ET.ElementTree(newxmlroot)
     #write tree to new svg
-    filename_output = filename_woextension + "_with_balloons.svg"
     try:
-        # Open the file for writing
         # xml_declaration=True adds the <?xml ...?> line
-        tree.write(filename_output, encoding=encoding, xml_declaration=True)
-
-        print(f"New SVG-file '{filename_output}' successfully written.")
+        if HAVE_LXML:
+            # libxml2 serializes in one C pass straight to the file
+            newxmlroot.getroottree().write(filename_output, encoding=encoding,
+                                           xml_declaration=True)
+        else:
+            # large write buffer so the Python serializer does not pay one
+            # syscall per small chunk
+            tree = ET.ElementTree(newxmlroot)
+            with open(filename_output, 'wb', buffering=1 << 20) as f:
+                tree.write(f, encoding=encoding, xml_declaration=True,
+                           short_empty_elements=True)
+
+        log.info("New SVG-file '%s' successfully written.", filename_output)
     except Exception as e:
-        print(f"Error writing SVG file '{filename_output}': {e}")
+        log.error("Error writing SVG file '%s': %s", filename_output, e)
     
-    html_code = embed_svg_in_html(newxmlroot)
-    filename_html = filename_woextension+".html"
     try:
-        with open(filename_html, "w", encoding=encoding) as f:
-            f.write(html_code)
+        with open(filename_html, "wb") as f:
+            embed_svg_in_html(newxmlroot, f)
     except IOError as e:
-        print(f"Error writing html-file: {e}")
+        log.error("Error writing html-file: %s", e)
         
 if __name__ == "__main__":
     main()